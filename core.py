@@ -6,14 +6,36 @@ Excel处理核心模块
 提供Excel文件的各种批量处理功能
 """
 
+import logging
 import os
 import traceback
 from pathlib import Path
 import shutil
-from datetime import datetime
+import weakref
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
+from datetime import datetime, timezone
+from zipfile import ZipFile, ZIP_DEFLATED
 
 import openpyxl
-from openpyxl.utils import get_column_letter
+from openpyxl.cell import Cell
+from openpyxl.utils import column_index_from_string, get_column_letter, range_boundaries
+from openpyxl.worksheet.dimensions import ColumnDimension, RowDimension
+from openpyxl.writer.excel import ExcelWriter
+
+
+logger = logging.getLogger(__name__)
+
+# 并行保存工作簿时使用的最大线程数
+MAX_SAVE_WORKERS = 8
+
+# 并行加载工作簿时使用的最大线程数
+MAX_LOAD_WORKERS = 8
+
+# 保存工作簿时的压缩级别。xlsx内容以XML为主，级别1比默认的6快数倍，文件只略大一些
+SAVE_COMPRESS_LEVEL = 1
 
 
 class ExcelProcessor:
@@ -24,10 +46,10 @@ class ExcelProcessor:
     def __init__(self):
         self.workbooks = {}
         self.output_dir = None
-        self.temp_files = {}
-        
-        # 清理可能存在的临时文件
-        self._cleanup_temp_files()
+        # 加载后被修改过的工作簿，未修改的工作簿保存时直接复制原始文件
+        self.dirty_files = set()
+        # 各工作表合并单元格的按行排序索引，合并或拆分后需失效
+        self._merge_index_cache = weakref.WeakKeyDictionary()
     
     def set_output_dir(self, output_dir):
         """
@@ -47,24 +69,39 @@ class ExcelProcessor:
     
     def load_workbooks(self, file_paths):
         """
-        加载Excel工作簿，并复制到临时工作区
+        加载Excel工作簿
+        
+        openpyxl只读取源文件，不会修改它，因此直接加载原始文件，不再复制临时副本
         
         Args:
             file_paths: Excel文件路径列表
         """
-        for file_path in file_paths:
-            try:
-                # 创建临时文件副本
-                temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                shutil.copy2(file_path, temp_path)
-                self.temp_files[file_path] = temp_path
-                
-                # 加载临时文件的工作簿
-                wb = openpyxl.load_workbook(temp_path, data_only=False)
+        if not file_paths:
+            return
+            
+        # 各文件的加载互不依赖，使用线程池并行读取，解压与磁盘I/O可以相互重叠
+        max_workers = min(MAX_LOAD_WORKERS, len(file_paths))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # map按传入顺序返回结果，工作簿的登记顺序与文件列表一致
+            workbooks = executor.map(self._load_workbook, file_paths)
+            for file_path, wb in zip(file_paths, workbooks):
                 self.workbooks[file_path] = wb
-            except Exception as e:
-                print(f"加载文件 {file_path} 失败: {str(e)}")
-                raise
+    
+    def _load_workbook(self, file_path):
+        """
+        加载单个工作簿
+        
+        Args:
+            file_path: Excel文件路径
+            
+        Returns:
+            Workbook: 工作簿对象
+        """
+        try:
+            return openpyxl.load_workbook(file_path, data_only=False)
+        except Exception as e:
+            logger.error("加载文件 %s 失败: %s", file_path, e)
+            raise
     
     def save_workbooks(self):
         """
@@ -73,126 +110,203 @@ class ExcelProcessor:
         if not self.output_dir:
             raise ValueError("未指定输出目录")
             
-        # 确保输出目录存在且可写
-        output_path = Path(self.output_dir)
-        if not output_path.exists():
-            try:
-                output_path.mkdir(parents=True, exist_ok=True)
-            except Exception as e:
-                raise PermissionError(f"无法创建输出目录 {self.output_dir}: {str(e)}")
-                
-        if not os.access(self.output_dir, os.W_OK):
-            raise PermissionError(f"输出目录 {self.output_dir} 不可写")
+        # 输出目录已由set_output_dir创建，是否可写由实际保存时的PermissionError反映
+        if not self.workbooks:
+            return
             
+        # 输出文件名取自源文件名，不同目录下的同名文件会写到同一个输出路径。
+        # 按输出路径分组，同组的文件在同一个线程内按原顺序依次保存，不会同时写同一个文件
+        groups = {}
         for file_path, wb in self.workbooks.items():
-            try:
-                # 获取文件名并构建新的保存路径
-                file_name = Path(file_path).name
-                output_path = Path(self.output_dir) / file_name
-                
-                # 检查目标文件是否已存在且可写
-                if output_path.exists() and not os.access(str(output_path), os.W_OK):
-                    raise PermissionError(f"目标文件 {output_path} 已存在且不可写")
-                    
-                # 保存工作簿
-                wb.save(output_path)
-                
-            except PermissionError as e:
-                print(f"权限错误: {str(e)}")
-                raise
-            except Exception as e:
-                print(f"保存文件 {file_path} 失败: {str(e)}")
-                raise
-            finally:
-                # 清理临时文件
-                self._cleanup_temp_file(file_path)
+            output_path = Path(self.output_dir) / Path(file_path).name
+            groups.setdefault(output_path, []).append((file_path, wb))
+        
+        # 不同输出路径的保存互不依赖，使用线程池并行写出，压缩与磁盘I/O可以相互重叠
+        max_workers = min(MAX_SAVE_WORKERS, len(groups))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(self._save_workbooks_to_output, output_path, items)
+                for output_path, items in groups.items()
+            ]
+        
+        # 所有文件都尝试保存后，再抛出第一个错误
+        for future in futures:
+            error = future.exception()
+            if error is not None:
+                raise error
+    
+    def _write_workbook(self, wb, path):
+        """
+        以SAVE_COMPRESS_LEVEL指定的压缩级别将工作簿写入文件
+        
+        与wb.save()的流程相同，只是自行创建压缩包以便指定压缩级别
+        
+        Args:
+            wb: 工作簿对象
+            path: 目标文件路径
+        """
+        archive = ZipFile(path, 'w', ZIP_DEFLATED, allowZip64=True, compresslevel=SAVE_COMPRESS_LEVEL)
+        wb.properties.modified = datetime.now(tz=timezone.utc).replace(tzinfo=None)
+        ExcelWriter(wb, archive).save()
+    
+    def _save_workbooks_to_output(self, output_path, items):
+        """
+        将输出路径相同的工作簿依次保存，与逐个保存时一样由后面的文件覆盖前面的结果
+        
+        Args:
+            output_path: 输出文件路径
+            items: (原始文件路径, 工作簿对象)列表
+        """
+        for file_path, wb in items:
+            self._save_workbook_to_output(file_path, wb, output_path)
+    
+    def _save_workbook_to_output(self, file_path, wb, output_path):
+        """
+        将单个工作簿保存到输出目录
+        
+        Args:
+            file_path: 原始文件路径
+            wb: 工作簿对象
+            output_path: 输出文件路径
+        """
+        try:
+            if file_path in self.dirty_files:
+                # 保存工作簿，目录或目标文件不可写时直接抛出PermissionError
+                self._write_workbook(wb, output_path)
+            else:
+                # 加载后未被任何操作修改，直接复制原始文件，省去重新序列化
+                try:
+                    shutil.copyfile(file_path, output_path)
+                except shutil.SameFileError:
+                    # 输出目录就是源文件所在目录时，目标文件已是原样内容
+                    pass
+            
+        except PermissionError as e:
+            logger.error("权限错误: %s", e)
+            raise
+        except Exception as e:
+            logger.error("保存文件 %s 失败: %s", file_path, e)
+            raise
     
     def convert_formulas_to_values(self, file_paths):
         """
         将公式转换为值
         
+        公式的缓存结果按坐标从原始文件中读取，只有在此之前未被其他步骤修改过的工作簿
+        才能与原始文件逐格对应。之前任何修改工作簿的步骤都会阻止转换，包括新建或删除工作表、
+        隐藏或显示行列、未匹配到合并单元格的拆分等不移动单元格的步骤；
+        这些文件中含有公式的不做转换，处理完其余文件后报错
+        
         Args:
             file_paths: 要处理的Excel文件路径列表
+            
+        Raises:
+            ValueError: 当含有公式的文件已被之前任一修改工作簿的步骤处理过时
         """
+        modified_files = []
         for file_path in file_paths:
             try:
-                # 确保使用工作簿副本，而不是直接修改原始工作簿
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 先用data_only=True加载以计算公式
-                    wb_data = openpyxl.load_workbook(temp_path, data_only=True)
-                    
-                    # 再用data_only=False加载以获取原始内容
-                    wb_formula = openpyxl.load_workbook(temp_path, data_only=False)
-                else:
-                    # 如果已经有工作簿副本，则使用它
-                    # 获取临时文件路径
-                    temp_path = self.temp_files.get(file_path)
-                    if not temp_path:
-                        # 如果没有临时文件，创建一个
-                        temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                        shutil.copy2(file_path, temp_path)
-                        self.temp_files[file_path] = temp_path
-                    
-                    # 先用data_only=True加载以计算公式
-                    wb_data = openpyxl.load_workbook(temp_path, data_only=True)
-                    
-                    # 使用已有的工作簿
-                    wb_formula = wb
+                wb_formula = self._ensure_workbook_loaded(file_path)
                 
-                for sheet_name in wb_formula.sheetnames:
-                    sheet_formula = wb_formula[sheet_name]
-                    sheet_data = wb_data[sheet_name]
-                    
-                    for row in range(1, sheet_formula.max_row + 1):
-                        for col in range(1, sheet_formula.max_column + 1):
-                            cell_formula = sheet_formula.cell(row=row, column=col)
-                            cell_data = sheet_data.cell(row=row, column=col)
-                            
-                            if cell_formula.data_type == 'f':  # 如果是公式
-                                cell_formula.value = cell_data.value
+                # 工作簿中没有任何公式时无需转换，也就不必再加载一遍文件
+                if not self._has_formulas(wb_formula):
+                    continue
+                
+                # 插入、删除行列等操作会移动单元格，原始文件中的缓存值已无法按坐标对应。
+                # 这里不区分之前的步骤是否移动过单元格，文件被任何步骤修改过都不做转换，
+                # 宁可报错也不能写入错位的值
+                if file_path in self.dirty_files:
+                    modified_files.append(file_path)
+                    continue
+                self.dirty_files.add(file_path)
                 
-                # 保存修改后的工作簿到临时文件
-                if temp_path:
-                    wb_formula.save(temp_path)
-                self.workbooks[file_path] = wb_formula
+                # 公式的缓存结果保存在原始文件中，用data_only=True加载以读取
+                # 该工作簿只读不写，使用read_only模式跳过样式解析，也不必解析外部链接
+                wb_data = openpyxl.load_workbook(file_path, data_only=True, read_only=True, keep_links=False)
+                
+                try:
+                    for sheet_name in wb_formula.sheetnames:
+                        # 处理过程中新建的工作表在原始文件中不存在，其中也不会有公式
+                        if sheet_name not in wb_data.sheetnames:
+                            continue
+                        sheet_formula = wb_formula[sheet_name]
+                        
+                        # 只扫描已存在的单元格找出公式，没有公式的工作表直接跳过
+                        formula_cells = [
+                            cell for cell in sheet_formula._cells.values()
+                            if cell.data_type == 'f'
+                        ]
+                        if not formula_cells:
+                            continue
+                        
+                        sheet_data = wb_data[sheet_name]
+                        
+                        # 按行分组公式单元格，并取得它们所在的最小矩形范围
+                        cells_by_row = defaultdict(list)
+                        for cell in formula_cells:
+                            cells_by_row[cell.row].append(cell)
+                        min_row = min(cells_by_row)
+                        max_row = max(cells_by_row)
+                        min_col = min(cell.column for cell in formula_cells)
+                        max_col = max(cell.column for cell in formula_cells)
+                        
+                        # read_only工作表不支持随机访问，只按行顺序读取公式所在范围的缓存值，
+                        # 公式表一侧直接按坐标写回，不会为空白位置创建单元格
+                        data_rows = sheet_data.iter_rows(
+                            min_row=min_row, max_row=max_row,
+                            min_col=min_col, max_col=max_col,
+                            values_only=True
+                        )
+                        for row, values in enumerate(data_rows, min_row):
+                            for cell in cells_by_row.get(row, ()):
+                                cell.value = values[cell.column - min_col]
+                finally:
+                    # read_only模式会一直持有文件句柄，用完需显式关闭
+                    wb_data.close()
                 
             except Exception as e:
-                print(f"处理文件 {file_path} 失败: {str(e)}")
+                logger.error("处理文件 %s 失败: %s", file_path, e)
                 raise
+        
+        if modified_files:
+            file_names = ", ".join(os.path.basename(f) for f in modified_files)
+            raise ValueError(f"以下文件在公式转值之前已被其他步骤修改（任何修改工作簿的步骤都会阻止转换，"
+                             f"包括新建工作表、隐藏行列等），无法读取对应的公式结果，"
+                             f"请将公式转值放在第一个步骤: {file_names}")
     
-    def _cleanup_temp_files(self):
+    def _has_formulas(self, wb):
         """
-        清理所有临时文件
+        检查工作簿中是否包含公式
+        
+        只检查各工作表中已存在的单元格，不会为空白位置创建单元格
+        
+        Args:
+            wb: 工作簿对象
+            
+        Returns:
+            bool: 存在公式单元格时返回True
         """
-        for file_path, temp_path in list(self.temp_files.items()):
-            try:
-                if Path(temp_path).exists():
-                    Path(temp_path).unlink()
-                del self.temp_files[file_path]
-            except Exception as e:
-                print(f"清理临时文件 {temp_path} 失败: {str(e)}")
+        return any(
+            cell.data_type == 'f'
+            for sheet in wb.worksheets
+            for cell in sheet._cells.values()
+        )
     
-    def _cleanup_temp_file(self, file_path):
+    def _ensure_workbook_loaded(self, file_path):
         """
-        清理指定文件的临时文件
+        获取文件对应的工作簿，尚未加载时直接加载原始文件并缓存
         
         Args:
-            file_path: 原始文件路径
+            file_path: Excel文件路径
+            
+        Returns:
+            Workbook: 工作簿对象，修改只发生在内存中
         """
-        if file_path in self.temp_files:
-            try:
-                temp_path = self.temp_files[file_path]
-                if Path(temp_path).exists():
-                    Path(temp_path).unlink()
-                del self.temp_files[file_path]
-            except Exception as e:
-                print(f"清理临时文件 {self.temp_files[file_path]} 失败: {str(e)}")
+        wb = self.workbooks.get(file_path)
+        if not wb:
+            wb = openpyxl.load_workbook(file_path)
+            self.workbooks[file_path] = wb
+        return wb
     
     def _get_data_range(self, sheet):
         """
@@ -204,22 +318,29 @@ class ExcelProcessor:
         Returns:
             tuple: (min_row, max_row, min_col, max_col)
         """
-        min_row = min_col = float('inf')
-        max_row = max_col = 0
-        
-        for row in range(1, sheet.max_row + 1):
-            for col in range(1, sheet.max_column + 1):
-                cell = sheet.cell(row=row, column=col)
-                if cell.value is not None:
-                    min_row = min(min_row, row)
-                    max_row = max(row, max_row)
-                    min_col = min(min_col, col)
-                    max_col = max(col, max_col)
-        
-        return (min_row if min_row != float('inf') else 1,
-                max_row if max_row != 0 else sheet.max_row,
-                min_col if min_col != float('inf') else 1,
-                max_col if max_col != 0 else sheet.max_column)
+        min_row = max_row = min_col = max_col = None
+        
+        # 只遍历已存在的单元格，一次扫描得到边界；
+        # 不按max_row×max_column逐格访问，避免为空白位置创建单元格对象
+        for (row, col), cell in sheet._cells.items():
+            if cell.value is None:
+                continue
+            if min_row is None:
+                min_row = max_row = row
+                min_col = max_col = col
+                continue
+            if row < min_row:
+                min_row = row
+            elif row > max_row:
+                max_row = row
+            if col < min_col:
+                min_col = col
+            elif col > max_col:
+                max_col = col
+        
+        if min_row is None:
+            return (1, sheet.max_row, 1, sheet.max_column)
+        return (min_row, max_row, min_col, max_col)
     
     def get_intersection(self, range1, range2):
         """
@@ -235,21 +356,15 @@ class ExcelProcessor:
         min_row1, min_col1, max_row1, max_col1 = range1
         min_row2, min_col2, max_row2, max_col2 = range2
         
-        # 如果一个范围在另一个范围的完全左边或右边，则没有交集
-        if max_col1 < min_col2 or min_col1 > max_col2:
-            return None
-        
-        # 如果一个范围在另一个范围的完全上边或下边，则没有交集
-        if max_row1 < min_row2 or min_row1 > max_row2:
-            return None
-        
-        # 计算交集区域
+        # 直接计算交集区域，起点不超过终点时才是有效的交集
         intersection_min_row = max(min_row1, min_row2)
         intersection_min_col = max(min_col1, min_col2)
         intersection_max_row = min(max_row1, max_row2)
         intersection_max_col = min(max_col1, max_col2)
         
-        return (intersection_min_row, intersection_min_col, intersection_max_row, intersection_max_col)
+        if intersection_min_row <= intersection_max_row and intersection_min_col <= intersection_max_col:
+            return (intersection_min_row, intersection_min_col, intersection_max_row, intersection_max_col)
+        return None
     
     def get_range_from_reference(self, range_ref):
         """
@@ -261,8 +376,6 @@ class ExcelProcessor:
         Returns:
             tuple: (min_row, min_col, max_row, max_col)
         """
-        from openpyxl.utils import range_boundaries
-        
         try:
             # 使用openpyxl的函数解析单元格范围
             min_col, min_row, max_col, max_row = range_boundaries(range_ref)
@@ -288,7 +401,8 @@ class ExcelProcessor:
             
         # 查找与目标范围有交集的合并单元格
         intersections = []
-        for merged_range in ws.merged_cells.ranges:
+        candidates = self._get_merged_cells_in_range(ws, target[0], target[2], target[1], target[3])
+        for merged_range in candidates:
             current_range = (
                 merged_range.min_row,
                 merged_range.min_col,
@@ -299,7 +413,6 @@ class ExcelProcessor:
             intersection = self.get_intersection(target, current_range)
             if intersection:
                 # 将交集区域转换为Excel引用格式
-                from openpyxl.utils import get_column_letter
                 intersection_start = f"{get_column_letter(intersection[1])}{intersection[0]}"
                 intersection_end = f"{get_column_letter(intersection[3])}{intersection[2]}"
                 intersection_range = intersection_start if intersection_start == intersection_end else f"{intersection_start}:{intersection_end}"
@@ -322,16 +435,50 @@ class ExcelProcessor:
         Returns:
             list: 合并单元格范围列表
         """
+        min_rows, entries, max_height = self._get_merge_index(sheet)
+        
+        # 起始行早于start_row - (max_height - 1)的合并单元格不可能覆盖到start_row，
+        # 结合起始行有序，二分得到候选区间，只需检查区间内的少量合并单元格
+        lo = bisect_left(min_rows, start_row - max_height + 1)
+        hi = bisect_right(min_rows, end_row)
+        
         merged_ranges = []
-        for merged_range in sheet.merged_cells.ranges:
+        for merged_range in entries[lo:hi]:
             # 检查合并单元格是否与指定范围有交集
             if not (merged_range.max_row < start_row or 
-                    merged_range.min_row > end_row or 
                     merged_range.max_col < start_col or 
                     merged_range.min_col > end_col):
                 merged_ranges.append(merged_range)
         return merged_ranges
     
+    def _get_merge_index(self, sheet):
+        """
+        获取工作表合并单元格的索引，首次访问时构建
+        
+        Args:
+            sheet: 工作表对象
+            
+        Returns:
+            tuple: (起始行列表, 按起始行排序的合并单元格列表, 合并单元格的最大行高)
+        """
+        index = self._merge_index_cache.get(sheet)
+        if index is None:
+            entries = sorted(sheet.merged_cells.ranges, key=lambda merged_range: merged_range.min_row)
+            min_rows = [merged_range.min_row for merged_range in entries]
+            max_height = max((merged_range.max_row - merged_range.min_row + 1 for merged_range in entries), default=1)
+            index = (min_rows, entries, max_height)
+            self._merge_index_cache[sheet] = index
+        return index
+    
+    def _invalidate_merge_index(self, sheet):
+        """
+        使指定工作表的合并单元格索引失效，合并或拆分单元格后调用
+        
+        Args:
+            sheet: 工作表对象
+        """
+        self._merge_index_cache.pop(sheet, None)
+    
     def process_merged_cells(self, file_paths, action='unmerge', mode='all', range_str=None):
         """
         处理合并单元格（合并或拆分）
@@ -342,52 +489,34 @@ class ExcelProcessor:
             mode: 处理模式，'all'表示处理整个工作表，'specific'表示处理指定范围
             range_str: 当mode为'specific'时，指定要处理的单元格范围
         """
+        # 范围字符串对所有文件和工作表都相同，在循环之前解析一次
+        bounds = None
+        if mode == 'specific' and range_str:
+            try:
+                # 单个单元格和范围都由range_boundaries一次解析
+                bounds = range_boundaries(range_str)
+            except ValueError:
+                raise
+            except Exception as e:
+                raise ValueError(f"无效的单元格范围格式: {range_str}, 错误: {str(e)}")
+        
         for file_path in file_paths:
             try:
-                # 确保使用工作簿副本，而不是直接修改原始工作簿
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 加载临时文件的工作簿
-                    wb = openpyxl.load_workbook(temp_path)
-                    self.workbooks[file_path] = wb
+                wb = self._ensure_workbook_loaded(file_path)
+                self.dirty_files.add(file_path)
                 
                 for sheet_name in wb.sheetnames:
                     sheet = wb[sheet_name]
                     
-                    if mode == 'specific' and range_str:
+                    if bounds is not None:
                         # 处理指定范围的合并单元格
-                        # 解析单元格范围
                         try:
-                            # 处理单个单元格的情况
-                            if ':' not in range_str:
-                                # 解析单个单元格坐标
-                                cell_coord = openpyxl.utils.cell.coordinate_to_tuple(range_str)
-                                min_row, min_col = cell_coord
-                                max_row, max_col = cell_coord
-                            else:
-                                # 处理范围的情况
-                                start_cell, end_cell = range_str.split(':')
-                                start_coord = openpyxl.utils.cell.coordinate_to_tuple(start_cell)
-                                end_coord = openpyxl.utils.cell.coordinate_to_tuple(end_cell)
-                                
-                                min_row, min_col = start_coord
-                                max_row, max_col = end_coord
+                            min_col, min_row, max_col, max_row = bounds
                             
                             # 找出所有与指定范围有交集的合并单元格
-                            overlapping_ranges = []
-                            for merged_range in list(sheet.merged_cells.ranges):
-                                merged_min_row, merged_min_col = merged_range.min_row, merged_range.min_col
-                                merged_max_row, merged_max_col = merged_range.max_row, merged_range.max_col
-                                
-                                # 检查是否有重叠
-                                if not (merged_max_row < min_row or merged_min_row > max_row or 
-                                        merged_max_col < min_col or merged_min_col > max_col):
-                                    overlapping_ranges.append(merged_range)
+                            overlapping_ranges = self._get_merged_cells_in_range(
+                                sheet, min_row, max_row, min_col, max_col
+                            )
                             
                             # 如果没有找到任何重叠的合并单元格，则报告错误
                             # 但是不要立即抛出异常，而是返回一个标志，让调用者决定如何处理
@@ -401,16 +530,14 @@ class ExcelProcessor:
                                 # 如果需要保留值，先获取左上角单元格的值
                                 top_left_value = None
                                 if action == 'keep_value':
-                                    top_left_value = sheet.cell(row=merged_range.min_row, column=merged_range.min_col).value
+                                    top_left_value = self._get_cell_value(sheet, merged_range.min_row, merged_range.min_col)
                                 
                                 # 拆分合并单元格
-                                sheet.unmerge_cells(str(merged_range))
+                                self._unmerge_range(sheet, merged_range)
                                 
                                 # 如果需要保留值，填充到所有单元格
                                 if action == 'keep_value' and top_left_value is not None:
-                                    for row in range(merged_range.min_row, merged_range.max_row + 1):
-                                        for col in range(merged_range.min_col, merged_range.max_col + 1):
-                                            sheet.cell(row=row, column=col).value = top_left_value
+                                    self._fill_range(sheet, merged_range, top_left_value)
                                 
                         except ValueError as ve:
                             # 传递自定义的ValueError
@@ -425,31 +552,22 @@ class ExcelProcessor:
                         merged_ranges = list(sheet.merged_cells.ranges)
                         
                         for merged_range in merged_ranges:
-                            # 获取左上角单元格的值
-                            top_left_value = sheet.cell(
-                                row=merged_range.min_row, 
-                                column=merged_range.min_col
-                            ).value
+                            # 获取左上角单元格的值（仅在需要保留值时获取）
+                            top_left_value = None
+                            if action == 'keep_value':
+                                top_left_value = self._get_cell_value(
+                                    sheet, merged_range.min_row, merged_range.min_col
+                                )
                             
                             # 拆分合并单元格
-                            sheet.unmerge_cells(str(merged_range))
+                            self._unmerge_range(sheet, merged_range)
                             
                             if action == 'keep_value':
                                 # 填充到所有单元格
-                                for row in range(merged_range.min_row, merged_range.max_row + 1):
-                                    for col in range(merged_range.min_col, merged_range.max_col + 1):
-                                        sheet.cell(row=row, column=col).value = top_left_value
-                
-                # 保存修改后的工作簿到临时文件
-                temp_path = self.temp_files.get(file_path)
-                if temp_path:
-                    wb.save(temp_path)
-                else:
-                    # 如果没有临时文件路径，这是一个错误情况
-                    raise ValueError(f"找不到文件 {file_path} 的临时文件路径")
+                                self._fill_range(sheet, merged_range, top_left_value)
                 
             except Exception as e:
-                print(f"处理文件 {file_path} 失败: {str(e)}")
+                logger.error("处理文件 %s 失败: %s", file_path, e)
                 raise
     
     def _process_merged_cells_in_range(self, sheet, merged_ranges, merge_mode='ignore'):
@@ -471,24 +589,81 @@ class ExcelProcessor:
             # 获取左上角单元格的值（仅在需要保留值时获取）
             top_left_value = None
             if merge_mode == 'unmerge_keep_value':
-                top_left_value = sheet.cell(
-                    row=merged_range.min_row,
-                    column=merged_range.min_col
-                ).value
+                top_left_value = self._get_cell_value(
+                    sheet, merged_range.min_row, merged_range.min_col
+                )
             
             # 拆分合并单元格
-            sheet.unmerge_cells(str(merged_range))
+            self._unmerge_range(sheet, merged_range)
             
             # 如果是unmerge_keep_value模式，则填充值到所有单元格
             if merge_mode == 'unmerge_keep_value' and top_left_value is not None:
-                for row in range(merged_range.min_row, merged_range.max_row + 1):
-                    for col in range(merged_range.min_col, merged_range.max_col + 1):
-                        sheet.cell(row=row, column=col).value = top_left_value
-            # 如果是unmerge_only模式，则清空所有单元格的值
+                self._fill_range(sheet, merged_range, top_left_value)
+            # 如果是unmerge_only模式，则清空单元格的值
+            # 拆分后只有左上角单元格还保留着值，其余位置无需逐个遍历
             elif merge_mode == 'unmerge_only':
-                for row in range(merged_range.min_row, merged_range.max_row + 1):
-                    for col in range(merged_range.min_col, merged_range.max_col + 1):
-                        sheet.cell(row=row, column=col).value = None
+                top_left = sheet._cells.get((merged_range.min_row, merged_range.min_col))
+                if top_left is not None:
+                    top_left.value = None
+    
+    def _unmerge_range(self, sheet, merged_range):
+        """
+        拆分合并单元格
+        
+        openpyxl的unmerge_cells会逐个删除范围内除左上角以外的单元格，位置上缺少单元格时抛出KeyError。
+        插入或删除行列不会移动合并范围，范围内的单元格可能已被移走，拆分前先补齐缺失的位置
+        
+        Args:
+            sheet: 工作表对象
+            merged_range: 合并单元格范围对象
+        """
+        cells = sheet._cells
+        for row, col in merged_range.cells:
+            if (row, col) not in cells:
+                cells[(row, col)] = Cell(sheet, row=row, column=col)
+        sheet.unmerge_cells(merged_range.coord)
+        # 只有确实拆分了合并单元格时才使索引失效，没有可拆分的范围时索引继续有效
+        self._invalidate_merge_index(sheet)
+    
+    def _get_cell_value(self, sheet, row, column):
+        """
+        读取指定位置单元格的值
+        
+        直接查询工作表的单元格字典，位置上没有单元格时返回None，
+        不会像sheet.cell()那样为空白位置创建单元格
+        
+        Args:
+            sheet: 工作表对象
+            row: 行号
+            column: 列号
+            
+        Returns:
+            单元格的值，不存在时为None
+        """
+        cell = sheet._cells.get((row, column))
+        return cell.value if cell is not None else None
+    
+    def _fill_range(self, sheet, cell_range, value):
+        """
+        将同一个值写入指定范围内的所有单元格
+        
+        拆分合并单元格后，除左上角外的单元格已从工作表中移除，
+        这里直接写入工作表的单元格字典，不再经由sheet.cell()逐个查找创建
+        
+        Args:
+            sheet: 工作表对象
+            cell_range: 单元格范围对象（需提供min_row、max_row、min_col、max_col）
+            value: 要写入的值
+        """
+        cells = sheet._cells
+        for row in range(cell_range.min_row, cell_range.max_row + 1):
+            for col in range(cell_range.min_col, cell_range.max_col + 1):
+                cell = cells.get((row, col))
+                if cell is not None:
+                    cell.value = value
+                elif value is not None:
+                    # 不存在的单元格本身就是空值，只有写入非空值时才需要创建
+                    cells[(row, col)] = Cell(sheet, row=row, column=col, value=value)
     
     def insert_rows(self, file_paths, sheet_indexes, position, count=1):
         """
@@ -502,32 +677,14 @@ class ExcelProcessor:
         """
         for file_path in file_paths:
             try:
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 加载临时文件的工作簿
-                    wb = openpyxl.load_workbook(temp_path)
-                    self.workbooks[file_path] = wb
-                
-                for sheet_index in sheet_indexes:
-                    if isinstance(sheet_index, int) and 0 <= sheet_index < len(wb.sheetnames):
-                        sheet = wb[wb.sheetnames[sheet_index]]
-                        sheet.insert_rows(position, count)
+                wb = self._ensure_workbook_loaded(file_path)
+                self.dirty_files.add(file_path)
                 
-                # 保存修改后的工作簿到临时文件
-                temp_path = self.temp_files.get(file_path)
-                if temp_path:
-                    wb.save(temp_path)
-                else:
-                    # 如果没有临时文件路径，这是一个错误情况
-                    raise ValueError(f"找不到文件 {file_path} 的临时文件路径")
+                for sheet in self._iter_selected_sheets(wb, sheet_indexes):
+                    sheet.insert_rows(position, count)
                 
             except Exception as e:
-                print(f"在文件 {file_path} 中插入行失败: {str(e)}")
+                logger.error("在文件 %s 中插入行失败: %s", file_path, e)
                 raise
     
     def delete_rows(self, file_paths, sheet_indexes, position, count=1, merge_mode='ignore'):
@@ -543,21 +700,12 @@ class ExcelProcessor:
         """
         for file_path in file_paths:
             try:
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 加载临时文件的工作簿
-                    wb = openpyxl.load_workbook(temp_path)
-                    self.workbooks[file_path] = wb
+                wb = self._ensure_workbook_loaded(file_path)
+                self.dirty_files.add(file_path)
                 
-                for sheet_index in sheet_indexes:
-                    if isinstance(sheet_index, int) and 0 <= sheet_index < len(wb.sheetnames):
-                        sheet = wb[wb.sheetnames[sheet_index]]
-                        
+                for sheet in self._iter_selected_sheets(wb, sheet_indexes):
+                    # 忽略合并单元格或工作表中没有合并单元格时，无需分析数据范围和合并单元格
+                    if merge_mode != 'ignore' and sheet.merged_cells.ranges:
                         # 获取数据范围
                         data_range = self._get_data_range(sheet)
                         
@@ -569,20 +717,12 @@ class ExcelProcessor:
                         
                         # 处理合并单元格
                         self._process_merged_cells_in_range(sheet, merged_ranges, merge_mode)
-                        
-                        # 删除行
-                        sheet.delete_rows(position, count)
-                
-                # 保存修改后的工作簿到临时文件
-                temp_path = self.temp_files.get(file_path)
-                if temp_path:
-                    wb.save(temp_path)
-                else:
-                    # 如果没有临时文件路径，这是一个错误情况
-                    raise ValueError(f"找不到文件 {file_path} 的临时文件路径")
+                    
+                    # 删除行
+                    sheet.delete_rows(position, count)
                 
             except Exception as e:
-                print(f"在文件 {file_path} 中删除行失败: {str(e)}")
+                logger.error("在文件 %s 中删除行失败: %s", file_path, e)
                 raise
     
     def insert_columns(self, file_paths, sheet_indexes, position, count=1):
@@ -597,32 +737,14 @@ class ExcelProcessor:
         """
         for file_path in file_paths:
             try:
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 加载临时文件的工作簿
-                    wb = openpyxl.load_workbook(temp_path)
-                    self.workbooks[file_path] = wb
-                
-                for sheet_index in sheet_indexes:
-                    if isinstance(sheet_index, int) and 0 <= sheet_index < len(wb.sheetnames):
-                        sheet = wb[wb.sheetnames[sheet_index]]
-                        sheet.insert_cols(position, count)
+                wb = self._ensure_workbook_loaded(file_path)
+                self.dirty_files.add(file_path)
                 
-                # 保存修改后的工作簿到临时文件
-                temp_path = self.temp_files.get(file_path)
-                if temp_path:
-                    wb.save(temp_path)
-                else:
-                    # 如果没有临时文件路径，这是一个错误情况
-                    raise ValueError(f"找不到文件 {file_path} 的临时文件路径")
+                for sheet in self._iter_selected_sheets(wb, sheet_indexes):
+                    sheet.insert_cols(position, count)
                 
             except Exception as e:
-                print(f"在文件 {file_path} 中插入列失败: {str(e)}")
+                logger.error("在文件 %s 中插入列失败: %s", file_path, e)
                 raise
     
     def delete_columns(self, file_paths, sheet_indexes, position, count=1, merge_mode='ignore'):
@@ -638,21 +760,12 @@ class ExcelProcessor:
         """
         for file_path in file_paths:
             try:
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 加载临时文件的工作簿
-                    wb = openpyxl.load_workbook(temp_path)
-                    self.workbooks[file_path] = wb
+                wb = self._ensure_workbook_loaded(file_path)
+                self.dirty_files.add(file_path)
                 
-                for sheet_index in sheet_indexes:
-                    if isinstance(sheet_index, int) and 0 <= sheet_index < len(wb.sheetnames):
-                        sheet = wb[wb.sheetnames[sheet_index]]
-                        
+                for sheet in self._iter_selected_sheets(wb, sheet_indexes):
+                    # 忽略合并单元格或工作表中没有合并单元格时，无需分析数据范围和合并单元格
+                    if merge_mode != 'ignore' and sheet.merged_cells.ranges:
                         # 获取数据范围
                         data_range = self._get_data_range(sheet)
                         
@@ -664,20 +777,12 @@ class ExcelProcessor:
                         
                         # 处理合并单元格
                         self._process_merged_cells_in_range(sheet, merged_ranges, merge_mode)
-                        
-                        # 删除列
-                        sheet.delete_cols(position, count)
-                
-                # 保存修改后的工作簿到临时文件
-                temp_path = self.temp_files.get(file_path)
-                if temp_path:
-                    wb.save(temp_path)
-                else:
-                    # 如果没有临时文件路径，这是一个错误情况
-                    raise ValueError(f"找不到文件 {file_path} 的临时文件路径")
+                    
+                    # 删除列
+                    sheet.delete_cols(position, count)
                 
             except Exception as e:
-                print(f"在文件 {file_path} 中删除列失败: {str(e)}")
+                logger.error("在文件 %s 中删除列失败: %s", file_path, e)
                 raise
     
     def hide_rows(self, file_paths, sheet_indexes, position, count=1):
@@ -692,35 +797,22 @@ class ExcelProcessor:
         """
         for file_path in file_paths:
             try:
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 加载临时文件的工作簿
-                    wb = openpyxl.load_workbook(temp_path)
-                    self.workbooks[file_path] = wb
-                
-                for sheet_index in sheet_indexes:
-                    if isinstance(sheet_index, int) and 0 <= sheet_index < len(wb.sheetnames):
-                        sheet = wb[wb.sheetnames[sheet_index]]
-                        
-                        # 隐藏指定范围的行
-                        for row in range(position, position + count):
-                            sheet.row_dimensions[row].hidden = True
+                wb = self._ensure_workbook_loaded(file_path)
+                self.dirty_files.add(file_path)
                 
-                # 保存修改后的工作簿到临时文件
-                temp_path = self.temp_files.get(file_path)
-                if temp_path:
-                    wb.save(temp_path)
-                else:
-                    # 如果没有临时文件路径，这是一个错误情况
-                    raise ValueError(f"找不到文件 {file_path} 的临时文件路径")
+                for sheet in self._iter_selected_sheets(wb, sheet_indexes):
+                    # 隐藏指定范围的行
+                    # 缺失的行尺寸直接以隐藏状态创建，不经由默认工厂创建后再修改
+                    row_dimensions = sheet.row_dimensions
+                    for row in range(position, position + count):
+                        dimension = row_dimensions.get(row)
+                        if dimension is None:
+                            row_dimensions[row] = RowDimension(sheet, index=row, hidden=True)
+                        else:
+                            dimension.hidden = True
                 
             except Exception as e:
-                print(f"在文件 {file_path} 中隐藏行失败: {str(e)}")
+                logger.error("在文件 %s 中隐藏行失败: %s", file_path, e)
                 raise
     
     def unhide_rows(self, file_paths, sheet_indexes, position, count=1):
@@ -735,35 +827,19 @@ class ExcelProcessor:
         """
         for file_path in file_paths:
             try:
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 加载临时文件的工作簿
-                    wb = openpyxl.load_workbook(temp_path)
-                    self.workbooks[file_path] = wb
+                wb = self._ensure_workbook_loaded(file_path)
+                self.dirty_files.add(file_path)
                 
-                for sheet_index in sheet_indexes:
-                    if isinstance(sheet_index, int) and 0 <= sheet_index < len(wb.sheetnames):
-                        sheet = wb[wb.sheetnames[sheet_index]]
-                        
-                        # 显示指定范围的行
-                        for row in range(position, position + count):
-                            sheet.row_dimensions[row].hidden = False
-                
-                # 保存修改后的工作簿到临时文件
-                temp_path = self.temp_files.get(file_path)
-                if temp_path:
-                    wb.save(temp_path)
-                else:
-                    # 如果没有临时文件路径，这是一个错误情况
-                    raise ValueError(f"找不到文件 {file_path} 的临时文件路径")
+                for sheet in self._iter_selected_sheets(wb, sheet_indexes):
+                    # 显示指定范围的行
+                    # 没有行尺寸记录或本来就未隐藏的行无需写入，避免生成多余的空记录
+                    row_dimensions = sheet.row_dimensions
+                    for row in range(position, position + count):
+                        if row in row_dimensions and row_dimensions[row].hidden:
+                            row_dimensions[row].hidden = False
                 
             except Exception as e:
-                print(f"在文件 {file_path} 中显示行失败: {str(e)}")
+                logger.error("在文件 %s 中显示行失败: %s", file_path, e)
                 raise
     
     def hide_columns(self, file_paths, sheet_indexes, position, count=1):
@@ -778,36 +854,15 @@ class ExcelProcessor:
         """
         for file_path in file_paths:
             try:
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 加载临时文件的工作簿
-                    wb = openpyxl.load_workbook(temp_path)
-                    self.workbooks[file_path] = wb
+                wb = self._ensure_workbook_loaded(file_path)
+                self.dirty_files.add(file_path)
                 
-                for sheet_index in sheet_indexes:
-                    if isinstance(sheet_index, int) and 0 <= sheet_index < len(wb.sheetnames):
-                        sheet = wb[wb.sheetnames[sheet_index]]
-                        
-                        # 隐藏指定范围的列
-                        for col in range(position, position + count):
-                            col_letter = get_column_letter(col)
-                            sheet.column_dimensions[col_letter].hidden = True
-                
-                # 保存修改后的工作簿到临时文件
-                temp_path = self.temp_files.get(file_path)
-                if temp_path:
-                    wb.save(temp_path)
-                else:
-                    # 如果没有临时文件路径，这是一个错误情况
-                    raise ValueError(f"找不到文件 {file_path} 的临时文件路径")
+                for sheet in self._iter_selected_sheets(wb, sheet_indexes):
+                    # 隐藏指定范围的列
+                    self._set_columns_hidden(sheet, position, position + count - 1, True)
                 
             except Exception as e:
-                print(f"在文件 {file_path} 中隐藏列失败: {str(e)}")
+                logger.error("在文件 %s 中隐藏列失败: %s", file_path, e)
                 raise
     
     def unhide_columns(self, file_paths, sheet_indexes, position, count=1):
@@ -822,38 +877,84 @@ class ExcelProcessor:
         """
         for file_path in file_paths:
             try:
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 加载临时文件的工作簿
-                    wb = openpyxl.load_workbook(temp_path)
-                    self.workbooks[file_path] = wb
+                wb = self._ensure_workbook_loaded(file_path)
+                self.dirty_files.add(file_path)
                 
-                for sheet_index in sheet_indexes:
-                    if isinstance(sheet_index, int) and 0 <= sheet_index < len(wb.sheetnames):
-                        sheet = wb[wb.sheetnames[sheet_index]]
-                        
-                        # 显示指定范围的列
-                        for col in range(position, position + count):
-                            col_letter = get_column_letter(col)
-                            sheet.column_dimensions[col_letter].hidden = False
-                
-                # 保存修改后的工作簿到临时文件
-                temp_path = self.temp_files.get(file_path)
-                if temp_path:
-                    wb.save(temp_path)
-                else:
-                    # 如果没有临时文件路径，这是一个错误情况
-                    raise ValueError(f"找不到文件 {file_path} 的临时文件路径")
+                for sheet in self._iter_selected_sheets(wb, sheet_indexes):
+                    # 显示指定范围的列
+                    self._set_columns_hidden(sheet, position, position + count - 1, False)
                 
             except Exception as e:
-                print(f"在文件 {file_path} 中显示列失败: {str(e)}")
+                logger.error("在文件 %s 中显示列失败: %s", file_path, e)
                 raise
     
+    def _set_columns_hidden(self, sheet, start_col, end_col, hidden):
+        """
+        设置连续多列的隐藏状态
+        
+        openpyxl中一个列尺寸可以覆盖连续多列(min~max)。与目标范围部分重叠的列尺寸
+        先在边界处拆开再修改；范围内没有列尺寸的空档按连续区间整段创建，
+        不再每列各建一个，保存时也只生成一条<col>记录
+        
+        Args:
+            sheet: 工作表对象
+            start_col: 起始列号
+            end_col: 结束列号
+            hidden: 是否隐藏
+        """
+        column_dimensions = sheet.column_dimensions
+        covered = []
+        
+        for key, dimension in list(column_dimensions.items()):
+            dim_min = dimension.min or column_index_from_string(dimension.index)
+            dim_max = dimension.max or dim_min
+            if dim_max < start_col or dim_min > end_col:
+                continue
+            
+            inner_min = max(dim_min, start_col)
+            inner_max = min(dim_max, end_col)
+            if dim_min < start_col or dim_max > end_col:
+                # 超出目标范围的部分拆成独立的列尺寸，保留原有的宽度、样式等属性
+                del column_dimensions[key]
+                for piece_min, piece_max in ((dim_min, start_col - 1),
+                                             (inner_min, inner_max),
+                                             (end_col + 1, dim_max)):
+                    if piece_min <= piece_max:
+                        piece = copy(dimension)
+                        piece.index = get_column_letter(piece_min)
+                        piece.min, piece.max = piece_min, piece_max
+                        column_dimensions[piece.index] = piece
+                dimension = column_dimensions[get_column_letter(inner_min)]
+            
+            dimension.hidden = hidden
+            covered.append((inner_min, inner_max))
+        
+        # 取消隐藏时，没有列尺寸的列本来就是显示的，无需创建
+        if not hidden:
+            return
+        
+        next_col = start_col
+        for covered_min, covered_max in sorted(covered):
+            if covered_min > next_col:
+                self._add_hidden_column_span(sheet, next_col, covered_min - 1)
+            next_col = covered_max + 1
+        if next_col <= end_col:
+            self._add_hidden_column_span(sheet, next_col, end_col)
+    
+    def _add_hidden_column_span(self, sheet, start_col, end_col):
+        """
+        为连续多列创建一个隐藏的列尺寸
+        
+        Args:
+            sheet: 工作表对象
+            start_col: 起始列号
+            end_col: 结束列号
+        """
+        col_letter = get_column_letter(start_col)
+        sheet.column_dimensions[col_letter] = ColumnDimension(
+            sheet, index=col_letter, min=start_col, max=end_col, hidden=True
+        )
+    
     def create_worksheet(self, file_paths, sheet_name):
         """
         创建工作表
@@ -864,28 +965,14 @@ class ExcelProcessor:
         """
         for file_path in file_paths:
             try:
-                # 确保使用工作簿副本，而不是直接修改原始工作簿
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 加载临时文件的工作簿
-                    wb = openpyxl.load_workbook(temp_path)
-                    self.workbooks[file_path] = wb
+                wb = self._ensure_workbook_loaded(file_path)
+                self.dirty_files.add(file_path)
                 
                 # 创建工作表
                 wb.create_sheet(title=sheet_name)
                 
-                # 保存修改后的工作簿到临时文件
-                temp_path = self.temp_files.get(file_path)
-                if temp_path:
-                    wb.save(temp_path)
-                
             except Exception as e:
-                print(f"在文件 {file_path} 中创建工作表失败: {str(e)}")
+                logger.error("在文件 %s 中创建工作表失败: %s", file_path, e)
                 raise
     
     def delete_worksheet(self, file_paths, sheet_name):
@@ -898,33 +985,19 @@ class ExcelProcessor:
         """
         for file_path in file_paths:
             try:
-                # 确保使用工作簿副本，而不是直接修改原始工作簿
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 加载临时文件的工作簿
-                    wb = openpyxl.load_workbook(temp_path)
-                    self.workbooks[file_path] = wb
+                wb = self._ensure_workbook_loaded(file_path)
+                self.dirty_files.add(file_path)
                 
                 # 检查工作表是否存在
                 if sheet_name in wb.sheetnames:
                     # 删除工作表
                     del wb[sheet_name]
-                    
-                    # 保存修改后的工作簿到临时文件
-                    temp_path = self.temp_files.get(file_path)
-                    if temp_path:
-                        wb.save(temp_path)
                 else:
-                    print(f"工作表 {sheet_name} 在文件 {file_path} 中不存在")
+                    logger.warning("工作表 %s 在文件 %s 中不存在", sheet_name, file_path)
                     continue                
                 
             except Exception as e:
-                print(f"在文件 {file_path} 中删除工作表失败: {str(e)}")
+                logger.error("在文件 %s 中删除工作表失败: %s", file_path, e)
                 raise
     
     def merge_cells(self, file_paths, sheet_indexes, range_str):
@@ -933,6 +1006,7 @@ class ExcelProcessor:
         
         与Excel默认行为一致，当指定范围内有多个单元格包含值时，
         合并后只保留左上角单元格的值，其他单元格的值将被丢弃。
+        该范围在工作表中已经是一个合并单元格时不做任何处理。
         
         Args:
             file_paths: Excel文件路径列表
@@ -940,89 +1014,146 @@ class ExcelProcessor:
             range_str: 要合并的单元格范围，例如'A1:B3'
         
         Raises:
-            ValueError: 当工作表索引无效时
+            ValueError: 当工作表索引无效，或合并范围与已有的合并单元格部分重叠时
             Exception: 当合并操作失败时
         """
-        from openpyxl.utils import range_boundaries
+        # 获取合并范围的边界，范围对所有文件和工作表都相同，只解析一次
+        min_col, min_row, max_col, max_row = range_boundaries(range_str)
         
+        # 先解析并检查所有文件的目标工作表，任一索引无效或范围重叠时在修改任何文件之前报错，
+        # 避免部分文件已合并、部分文件未处理的中间状态
+        targets = []
         for file_path in file_paths:
             try:
-                # 确保使用工作簿副本，而不是直接修改原始工作簿
-                wb = self.workbooks.get(file_path)
-                if not wb:
-                    # 创建临时文件副本
-                    temp_path = Path(file_path).parent / f"temp_{Path(file_path).name}"
-                    shutil.copy2(file_path, temp_path)
-                    self.temp_files[file_path] = temp_path
-                    
-                    # 加载临时文件的工作簿
-                    wb = openpyxl.load_workbook(temp_path)
-                    self.workbooks[file_path] = wb
-                
+                wb = self._ensure_workbook_loaded(file_path)
+                sheets = []
                 for sheet_index in sheet_indexes:
-                    # 支持通过索引或名称访问工作表
-                    if isinstance(sheet_index, int) and 0 <= sheet_index < len(wb.sheetnames):
-                        sheet = wb[wb.sheetnames[sheet_index]]
-                    elif isinstance(sheet_index, str) and sheet_index in wb.sheetnames:
-                        sheet = wb[sheet_index]
-                    else:
-                        raise ValueError(f"无效的工作表索引或名称: {sheet_index}")
-                        
-                    # 获取合并范围的边界
-                    min_col, min_row, max_col, max_row = range_boundaries(range_str)
-                    
-                    # 保存左上角单元格的值
-                    top_left_value = sheet.cell(row=min_row, column=min_col).value
-                    
-                    # 检查范围内是否有其他非空值
-                    has_other_values = False
-                    non_empty_cells = []
-                    
-                    for row in range(min_row, max_row + 1):
-                        for col in range(min_col, max_col + 1):
-                            if row == min_row and col == min_col:
-                                continue  # 跳过左上角单元格
-                            cell = sheet.cell(row=row, column=col)
-                            if cell.value is not None:
-                                has_other_values = True
-                                cell_addr = f"{get_column_letter(col)}{row}"
-                                non_empty_cells.append(cell_addr)
+                    sheet = self._resolve_sheet(wb, sheet_index)
+                    # 同一工作表被重复指定时只合并一次
+                    if sheet in sheets:
+                        continue
                     
-                    # 合并单元格前记录警告信息
-                    if has_other_values:
-                        cells_str = ", ".join(non_empty_cells[:5])
-                        if len(non_empty_cells) > 5:
-                            cells_str += f" 等共 {len(non_empty_cells)} 个单元格"
-                        print(f"警告: 在文件 {file_path} 的工作表 {sheet.title} 中，"
-                              f"合并范围 {range_str} 内存在多个非空值({cells_str})，"
-                              f"仅保留左上角单元格 {range_str.split(':')[0]} 的值。")
+                    # openpyxl不检查重叠，重叠的合并范围会被原样保存，并导致之后拆分时出错
+                    overlapping_ranges = self._get_merged_cells_in_range(
+                        sheet, min_row, max_row, min_col, max_col
+                    )
+                    # 与已有合并单元格完全相同的范围已经合并过，无需再次合并
+                    if any(merged_range.bounds == (min_col, min_row, max_col, max_row)
+                           for merged_range in overlapping_ranges):
+                        continue
+                    if overlapping_ranges:
+                        overlapping = ", ".join(merged_range.coord for merged_range in overlapping_ranges)
+                        raise ValueError(f"合并范围 {range_str} 与工作表 {sheet.title} 中已有的合并单元格 "
+                                         f"{overlapping} 重叠")
+                    sheets.append(sheet)
+                if sheets:
+                    targets.append((file_path, sheets))
+            except Exception as e:
+                logger.error("在文件 %s 中合并单元格失败: %s", file_path, e)
+                raise
+        
+        for file_path, sheets in targets:
+            try:
+                self.dirty_files.add(file_path)
+                
+                for sheet in sheets:
+                    # 合并会丢弃左上角以外的值，仅在警告级别日志启用时才扫描范围内的非空单元格
+                    if logger.isEnabledFor(logging.WARNING):
+                        self._warn_discarded_values(file_path, sheet, range_str,
+                                                    min_row, max_row, min_col, max_col)
                     
-                    # 合并单元格
+                    # 合并单元格，openpyxl只把左上角以外的单元格替换为合并单元格，左上角的值原样保留
                     sheet.merge_cells(range_str)
-                    
-                    # 确保合并后的单元格保留左上角的值
-                    merged_cell = sheet.cell(row=min_row, column=min_col)
-                    merged_cell.value = top_left_value
-                
-                # 保存修改后的工作簿到临时文件
-                temp_path = self.temp_files.get(file_path)
-                if temp_path:
-                    wb.save(temp_path)
-                else:
-                    # 如果没有临时文件路径，这是一个错误情况
-                    raise ValueError(f"找不到文件 {file_path} 的临时文件路径")
+                    self._invalidate_merge_index(sheet)
                 
             except Exception as e:
-                print(f"在文件 {file_path} 中合并单元格失败: {str(e)}")
+                logger.error("在文件 %s 中合并单元格失败: %s", file_path, e)
                 raise
     
+    def _iter_selected_sheets(self, wb, sheet_indexes):
+        """
+        按整数索引依次返回工作簿中的工作表，忽略超出范围或非整数的索引
+        
+        Args:
+            wb: 工作簿对象
+            sheet_indexes: 工作表索引列表
+            
+        Yields:
+            Worksheet: 工作表对象
+        """
+        sheet_names = wb.sheetnames
+        for sheet_index in sheet_indexes:
+            if isinstance(sheet_index, int) and 0 <= sheet_index < len(sheet_names):
+                yield wb[sheet_names[sheet_index]]
+    
+    def _resolve_sheet(self, wb, sheet_index):
+        """
+        根据索引或名称获取工作表
+        
+        Args:
+            wb: 工作簿对象
+            sheet_index: 整数索引或工作表名称
+            
+        Returns:
+            Worksheet: 工作表对象
+            
+        Raises:
+            ValueError: 当工作表索引或名称无效时
+        """
+        sheet_names = wb.sheetnames
+        if isinstance(sheet_index, int) and 0 <= sheet_index < len(sheet_names):
+            return wb[sheet_names[sheet_index]]
+        if isinstance(sheet_index, str) and sheet_index in sheet_names:
+            return wb[sheet_index]
+        raise ValueError(f"无效的工作表索引或名称: {sheet_index}")
+    
+    def _warn_discarded_values(self, file_path, sheet, range_str, min_row, max_row, min_col, max_col):
+        """
+        合并前检查范围内左上角以外的非空单元格，存在时记录警告
+        
+        Args:
+            file_path: Excel文件路径
+            sheet: 工作表对象
+            range_str: 要合并的单元格范围
+            min_row: 起始行
+            max_row: 结束行
+            min_col: 起始列
+            max_col: 结束列
+        """
+        # 直接查询工作表已存储的单元格，不像iter_rows那样为范围内每个空白位置创建单元格；
+        # 只有警告中展示的前5个单元格需要生成地址，其余只计数
+        non_empty_count = 0
+        non_empty_cells = []
+        
+        cells = sheet._cells
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                if row == min_row and col == min_col:
+                    continue  # 跳过左上角单元格
+                cell = cells.get((row, col))
+                if cell is None or cell.value is None:
+                    continue  # 跳过空单元格
+                non_empty_count += 1
+                if non_empty_count <= 5:
+                    non_empty_cells.append(f"{get_column_letter(col)}{row}")
+        
+        if non_empty_count:
+            cells_str = ", ".join(non_empty_cells)
+            if non_empty_count > 5:
+                cells_str += f" 等共 {non_empty_count} 个单元格"
+            logger.warning("在文件 %s 的工作表 %s 中，合并范围 %s 内存在多个非空值(%s)，"
+                           "仅保留左上角单元格 %s 的值。",
+                           file_path, sheet.title, range_str, cells_str, range_str.split(':')[0])
+    
     def close_workbooks(self):
         """
         关闭所有工作簿
         """
-        for wb in self.workbooks.values():
+        for file_path, wb in self.workbooks.items():
+            # close()会关闭仍打开的压缩包句柄；只忽略关闭时的I/O错误，其他异常照常抛出
             try:
                 wb.close()
-            except:
-                pass
-        self.workbooks.clear()
\ No newline at end of file
+            except (AttributeError, OSError) as e:
+                logger.debug("关闭文件 %s 失败: %s", file_path, e)
+        self.workbooks.clear()
+        self.dirty_files.clear()
\ No newline at end of file
@@ -6,13 +6,22 @@
 提供Excel批量处理工具的执行功能实现
 """
 
-from PyQt5.QtWidgets import QMessageBox, QProgressDialog, QFileDialog
+import logging
+
+from PyQt5.QtWidgets import (
+    QMessageBox, QProgressDialog, QFileDialog, QDialog, QVBoxLayout, QHBoxLayout,
+    QLabel, QTableWidget, QTableWidgetItem, QPushButton
+)
 from PyQt5.QtCore import Qt
 
 from core import ExcelProcessor
 from processing import ProcessingThread
 from models import StepItem
 from message_utils import format_result_message
+from report import generate_report
+
+
+logger = logging.getLogger(__name__)
 
 
 class ExecutionMixin:
@@ -62,10 +71,11 @@ class ExecutionMixin:
         self.processing_thread.operation_complete.connect(self.handle_operation_complete)
         self.processing_thread.step_results_updated.connect(self.show_step_results)
         
-        # 打印调试信息
-        print(f"开始执行 {len(self.steps)} 个步骤:")
-        for i, step in enumerate(self.steps, 1):
-            print(f"步骤 {i}: {step.operation} - {step.params}")
+        # 输出调试信息，未开启DEBUG级别时跳过整个循环
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("开始执行 %d 个步骤:", len(self.steps))
+            for i, step in enumerate(self.steps, 1):
+                logger.debug("步骤 %d: %s - %s", i, step.operation, step.params)
         
         # 启动线程
         self.processing_thread.start()
@@ -91,16 +101,14 @@ class ExecutionMixin:
             
     def show_step_results(self, step_results):
         """显示步骤执行结果对话框，并询问用户是否生成Excel报告"""
-        # 在控制台输出结果
-        print("执行结果详情:")
-        for result in step_results:
-            status = "✓" if result['success'] else "✗"
-            print(f"{status} {result['message']}")
+        # 在日志中输出结果
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("执行结果详情:")
+            for result in step_results:
+                status = "✓" if result['success'] else "✗"
+                logger.debug("%s %s", status, result['message'])
         
         # 创建结果对话框
-        from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTableWidget, QTableWidgetItem, QPushButton, QHBoxLayout
-        from PyQt5.QtCore import Qt
-        
         dialog = QDialog(self)
         dialog.setWindowTitle("执行结果")
         dialog.setMinimumWidth(800)
@@ -187,7 +195,6 @@ class ExecutionMixin:
     def generate_excel_report(self, step_results, dialog=None):
         """生成Excel报告"""
         try:
-            from report import generate_report
             report_path = generate_report(step_results, self.processor.output_dir)
             
             # 显示成功消息
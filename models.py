@@ -6,6 +6,8 @@
 提供步骤项等数据模型的定义
 """
 
+from utils import PUNCTUATION_TABLE
+
 
 class StepItem:
     """步骤项，用于记录操作步骤"""
@@ -51,13 +53,13 @@ class StepItem:
                 params_desc.append(f'模式：{mode_desc}')
             if 'range_str' in self.params:
                 # 将中文符号转换为英文符号
-                range_str = self.params["range_str"].replace('，', ',').replace('：', ':')
+                range_str = self.params["range_str"].translate(PUNCTUATION_TABLE)
                 params_desc.append(f'单元格：{range_str}')
             if 'sheet_name' in self.params:
                 params_desc.append(f'工作表：{self.params["sheet_name"]}')
             if 'position' in self.params:
                 # 将中文符号转换为英文符号
-                position = self.params["position"].replace('，', ',').replace('：', ':')
+                position = self.params["position"].translate(PUNCTUATION_TABLE)
                 params_desc.append(f'位置：{position}')
             # 添加对删除行列操作中合并单元格处理模式的描述
             if self.operation in ['delete_rows', 'delete_columns'] and 'merge_mode' in self.params:
@@ -8,11 +8,19 @@
 
 import traceback
 import json
+import logging
 import os
+import re
 from PyQt5.QtCore import QThread, pyqtSignal
 import openpyxl.utils.cell
 
-from utils import parse_range_string
+from utils import parse_range_string, merge_spans
+
+
+logger = logging.getLogger(__name__)
+
+# 从操作名称中提取单元格范围，如：合并单元格(A1:B2)
+MERGE_RANGE_PATTERN = re.compile(r'\(([A-Za-z0-9:]+)\)')
 
 
 class ProcessingThread(QThread):
@@ -32,7 +40,7 @@ class ProcessingThread(QThread):
     def run(self):
         try:
             self.step_results = []  # 每次运行前清空
-            # 加载工作簿（会自动创建临时文件）
+            # 加载工作簿
             self.processor.load_workbooks(self.file_paths)
             self.progress_updated.emit(20)
 
@@ -66,8 +74,7 @@ class ProcessingThread(QThread):
                         range_str = params.get('range_str', '')
                         if operation_name.startswith('合并单元格') and not range_str:
                             # 尝试从操作名称中提取范围，格式如：合并单元格(A1:B2)
-                            import re
-                            match = re.search(r'\(([A-Za-z0-9:]+)\)', operation_name)
+                            match = MERGE_RANGE_PATTERN.search(operation_name)
                             if match:
                                 range_str = match.group(1)
                         
@@ -148,21 +155,10 @@ class ProcessingThread(QThread):
                                     sheet = wb[sheet_name]
                                     
                                     # 使用find_intersections方法检查是否有交集
+                                    # 与某个合并单元格完全重合的范围必然与其相交，无需再逐个比较范围字符串
                                     intersections = self.processor.find_intersections(sheet, range_str)
                                     
-                                    # 如果没有交集，检查是否是完全匹配的合并单元格
-                                    is_merged = False
                                     if not intersections:
-                                        for merged_range in sheet.merged_cells.ranges:
-                                            if str(merged_range) == range_str:
-                                                is_merged = True
-                                                break
-                                    else:
-                                        # 有交集，标记为已合并
-                                        is_merged = True
-                                        has_intersection = True
-                                    
-                                    if not is_merged:
                                         not_merged_files.append(file_path)
                                         break
                             
@@ -365,29 +361,30 @@ class ProcessingThread(QThread):
                             if merge_mode not in ['ignore', 'unmerge_only', 'unmerge_keep_value']:
                                 merge_mode = 'ignore'
                         
+                        spans = []
                         for pos in positions:
                             if isinstance(pos, tuple):
                                 start, end = pos
-                                count = int(end) - int(start) + 1
-                                # 调用相应的处理方法
-                                if operation_name == 'delete_rows':
-                                    self.processor.delete_rows(
-                                        self.file_paths, sheet_indexes, int(start), count, merge_mode=merge_mode
-                                    )
-                                else:
-                                    getattr(self.processor, operation_name)(
-                                        self.file_paths, sheet_indexes, int(start), count
-                                    )
+                                spans.append((int(start), int(end)))
                             else:
                                 # 单个位置
-                                if operation_name == 'delete_rows':
-                                    self.processor.delete_rows(
-                                        self.file_paths, sheet_indexes, int(pos), 1, merge_mode=merge_mode
-                                    )
-                                else:
-                                    getattr(self.processor, operation_name)(
-                                        self.file_paths, sheet_indexes, int(pos), 1
-                                    )
+                                spans.append((int(pos), int(pos)))
+                        
+                        # 隐藏/显示的结果与顺序无关，先合并重叠的范围，避免重复处理
+                        if operation_name in ['hide_rows', 'unhide_rows']:
+                            spans = merge_spans(spans)
+                        
+                        for start, end in spans:
+                            count = end - start + 1
+                            # 调用相应的处理方法
+                            if operation_name == 'delete_rows':
+                                self.processor.delete_rows(
+                                    self.file_paths, sheet_indexes, start, count, merge_mode=merge_mode
+                                )
+                            else:
+                                getattr(self.processor, operation_name)(
+                                    self.file_paths, sheet_indexes, start, count
+                                )
                     
                     # 列操作
                     elif operation_name in ['insert_columns', 'delete_columns', 'hide_columns', 'unhide_columns']:
@@ -402,34 +399,33 @@ class ProcessingThread(QThread):
                             if merge_mode not in ['ignore', 'unmerge_only', 'unmerge_keep_value']:
                                 merge_mode = 'ignore'
                         
+                        spans = []
                         for pos in positions:
                             if isinstance(pos, tuple):
                                 start, end = pos
                                 start_idx = ord(start.upper()) - ord('A') + 1
                                 end_idx = ord(end.upper()) - ord('A') + 1
-                                count = end_idx - start_idx + 1
-                                
-                                # 调用相应的处理方法
-                                if operation_name == 'delete_columns':
-                                    self.processor.delete_columns(
-                                        self.file_paths, sheet_indexes, start_idx, count, merge_mode=merge_mode
-                                    )
-                                else:
-                                    getattr(self.processor, operation_name)(
-                                        self.file_paths, sheet_indexes, start_idx, count
-                                    )
+                                spans.append((start_idx, end_idx))
                             else:
                                 # 单个位置
                                 col_idx = ord(pos.upper()) - ord('A') + 1
-                                
-                                if operation_name == 'delete_columns':
-                                    self.processor.delete_columns(
-                                        self.file_paths, sheet_indexes, col_idx, 1, merge_mode=merge_mode
-                                    )
-                                else:
-                                    getattr(self.processor, operation_name)(
-                                        self.file_paths, sheet_indexes, col_idx, 1
-                                    )
+                                spans.append((col_idx, col_idx))
+                        
+                        # 隐藏/显示的结果与顺序无关，先合并重叠的范围，避免重复处理
+                        if operation_name in ['hide_columns', 'unhide_columns']:
+                            spans = merge_spans(spans)
+                        
+                        for start_idx, end_idx in spans:
+                            count = end_idx - start_idx + 1
+                            # 调用相应的处理方法
+                            if operation_name == 'delete_columns':
+                                self.processor.delete_columns(
+                                    self.file_paths, sheet_indexes, start_idx, count, merge_mode=merge_mode
+                                )
+                            else:
+                                getattr(self.processor, operation_name)(
+                                    self.file_paths, sheet_indexes, start_idx, count
+                                )
                     else:
                         # 未知操作类型
                         raise ValueError(f"未知的操作类型: {operation_name}")
@@ -481,20 +477,20 @@ class ProcessingThread(QThread):
 
             except PermissionError as e:
                 error_msg = f"文件保存权限错误: {str(e)}"
-                print(error_msg)
+                logger.error(error_msg)
                 self.operation_complete.emit(False, error_msg)
                 return
             except Exception as e:
                 error_msg = f"文件保存过程中出错: {str(e)}\n{traceback.format_exc()}"
-                print(error_msg)
+                logger.error(error_msg)
                 self.operation_complete.emit(False, error_msg)
                 return
 
         except PermissionError as e:
             error_msg = f"处理过程中权限错误: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             self.operation_complete.emit(False, error_msg)
         except Exception as e:
             error_msg = f"处理过程中出错: {str(e)}\n{traceback.format_exc()}"
-            print(error_msg)
+            logger.error(error_msg)
             self.operation_complete.emit(False, error_msg)
\ No newline at end of file
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+core模块的测试
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+
+import openpyxl
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core import ExcelProcessor
+
+
+def save_with_cached_values(wb, path, cached_values):
+    """
+    保存工作簿，并为公式写入缓存结果
+    
+    openpyxl保存时不会写出公式的计算结果，这里直接修改工作表XML补上<v>元素，
+    模拟Excel保存过的文件
+    
+    Args:
+        wb: 工作簿对象
+        path: 保存路径
+        cached_values: 公式文本（不含'='）到缓存值的映射
+    """
+    wb.save(path)
+    temp_path = path + '.tmp'
+    with zipfile.ZipFile(path) as zin, zipfile.ZipFile(temp_path, 'w') as zout:
+        for item in zin.infolist():
+            data = zin.read(item.filename)
+            if item.filename.startswith('xl/worksheets/sheet'):
+                for formula, value in cached_values.items():
+                    data = data.replace(f'<f>{formula}</f><v />'.encode(),
+                                        f'<f>{formula}</f><v>{value}</v>'.encode())
+            zout.writestr(item, data)
+    os.replace(temp_path, path)
+
+
+class ExcelProcessorTestCase(unittest.TestCase):
+    """ExcelProcessor测试基类，提供临时目录和处理器"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.processor = ExcelProcessor()
+        self.processor.set_output_dir(os.path.join(self.temp_dir, 'output'))
+    
+    def tearDown(self):
+        self.processor.close_workbooks()
+        shutil.rmtree(self.temp_dir)
+    
+    def make_workbook(self, name='book.xlsx', subdir=None):
+        """创建并返回一个空白工作簿及其保存路径"""
+        folder = os.path.join(self.temp_dir, subdir) if subdir else self.temp_dir
+        os.makedirs(folder, exist_ok=True)
+        return openpyxl.Workbook(), os.path.join(folder, name)
+
+
+class ConvertFormulasTest(ExcelProcessorTestCase):
+
+    def make_formula_workbook(self):
+        wb, path = self.make_workbook()
+        ws = wb.active
+        cached = {}
+        for row in range(1, 6):
+            ws.cell(row=row, column=1, value=row)
+            ws.cell(row=row, column=2, value=f'=A{row}*100')
+            cached[f'A{row}*100'] = row * 100
+        save_with_cached_values(wb, path, cached)
+        return path
+    
+    def test_converts_cached_values(self):
+        path = self.make_formula_workbook()
+        self.processor.load_workbooks([path])
+        self.processor.convert_formulas_to_values([path])
+        
+        ws = self.processor.workbooks[path].active
+        self.assertEqual([ws.cell(row=r, column=2).value for r in range(1, 6)],
+                         [100, 200, 300, 400, 500])
+    
+    def test_refuses_after_structural_edit(self):
+        path = self.make_formula_workbook()
+        self.processor.load_workbooks([path])
+        self.processor.insert_rows([path], [0], 1, 1)
+        
+        with self.assertRaises(ValueError):
+            self.processor.convert_formulas_to_values([path])
+        
+        # 公式保持原样，不会写入与原始文件错位的缓存值
+        ws = self.processor.workbooks[path].active
+        self.assertEqual([ws.cell(row=r, column=2).value for r in range(2, 7)],
+                         [f'=A{r}*100' for r in range(1, 6)])
+
+
+class UnmergeAfterShiftTest(ExcelProcessorTestCase):
+    
+    def test_delete_rows_after_insert_inside_merged_range(self):
+        wb, path = self.make_workbook()
+        ws = wb.active
+        for row in range(1, 6):
+            for col in range(1, 5):
+                ws.cell(row=row, column=col, value=row * 10 + col)
+        ws.merge_cells('C1:C4')
+        wb.save(path)
+        
+        self.processor.load_workbooks([path])
+        # 插入行不会移动合并范围，合并范围内的部分位置此时已没有单元格
+        self.processor.insert_rows([path], [0], 1, 3)
+        self.processor.delete_rows([path], [0], 1, 3, merge_mode='unmerge_only')
+        
+        ws = self.processor.workbooks[path].active
+        self.assertEqual(len(ws.merged_cells.ranges), 0)
+        self.assertEqual([ws.cell(row=row, column=3).value for row in range(1, 6)],
+                         [None, None, None, None, 53])
+
+
+class MergeCellsTest(ExcelProcessorTestCase):
+    
+    def test_rejects_overlapping_range(self):
+        wb, path = self.make_workbook()
+        wb.active.merge_cells('A1:B2')
+        wb.save(path)
+        
+        self.processor.load_workbooks([path])
+        with self.assertRaises(ValueError):
+            self.processor.merge_cells([path], [0], 'B2:C3')
+        
+        ws = self.processor.workbooks[path].active
+        self.assertEqual([merged_range.coord for merged_range in ws.merged_cells.ranges], ['A1:B2'])
+        
+        # 工作表保持有效，后续步骤可以正常拆分
+        self.processor.process_merged_cells([path], action='keep_value', mode='all')
+        self.assertEqual(len(ws.merged_cells.ranges), 0)
+    
+    def test_remerge_of_existing_range(self):
+        wb, path = self.make_workbook()
+        ws = wb.active
+        ws['A1'] = 'keep'
+        ws.merge_cells('A1:B2')
+        wb.save(path)
+        
+        self.processor.load_workbooks([path])
+        self.processor.merge_cells([path], [0], 'A1:B2')
+        
+        ws = self.processor.workbooks[path].active
+        self.assertEqual([merged_range.coord for merged_range in ws.merged_cells.ranges], ['A1:B2'])
+        self.assertEqual(ws['A1'].value, 'keep')
+        
+        self.processor.process_merged_cells([path], action='keep_value', mode='all')
+        self.assertEqual(len(ws.merged_cells.ranges), 0)
+
+
+class SaveWorkbooksTest(ExcelProcessorTestCase):
+    
+    def test_same_name_from_different_folders(self):
+        paths = []
+        for index, folder in enumerate(['d1', 'd2']):
+            wb, path = self.make_workbook('same.xlsx', subdir=folder)
+            for row in range(1, 2001):
+                wb.active.cell(row=row, column=1, value=f'{folder}-{row}')
+            wb.save(path)
+            paths.append(path)
+        
+        self.processor.load_workbooks(paths)
+        self.processor.hide_rows(paths, [0], 1, 1)
+        self.processor.save_workbooks()
+        
+        # 与逐个保存时一样，后一个文件覆盖前一个，输出文件必须完整可读
+        output_path = os.path.join(self.processor.output_dir, 'same.xlsx')
+        with zipfile.ZipFile(output_path) as archive:
+            self.assertIsNone(archive.testzip())
+        ws = openpyxl.load_workbook(output_path).active
+        self.assertEqual(ws['A1'].value, 'd2-1')
+
+
+if __name__ == '__main__':
+    unittest.main()
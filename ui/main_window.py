@@ -6,6 +6,8 @@
 整合所有UI功能模块，提供完整的Excel批量处理工具界面
 """
 
+import logging
+
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, 
     QPushButton, QLabel, QButtonGroup, QRadioButton,
@@ -19,6 +21,10 @@ from ui.step_operations import StepOperationsMixin
 from ui.worksheet_operations import WorksheetOperationsMixin
 from ui.row_col_operations import RowColOperationsMixin
 
+
+logger = logging.getLogger(__name__)
+
+
 class MainWindow(BaseWindow, FileOperationsMixin, StepOperationsMixin,
                 WorksheetOperationsMixin, RowColOperationsMixin):
     """主窗口类，整合所有功能模块"""
@@ -413,7 +419,7 @@ class MainWindow(BaseWindow, FileOperationsMixin, StepOperationsMixin,
         except Exception as e:
             import traceback
             error_msg = traceback.format_exc()
-            print(f"添加拆分合并单元格步骤失败: {error_msg}")
+            logger.error("添加拆分合并单元格步骤失败: %s", error_msg)
             QMessageBox.critical(self, "错误", f"添加拆分合并单元格步骤失败: {str(e)}")
 
     def insert_unmerge_step(self):
@@ -465,7 +471,7 @@ class MainWindow(BaseWindow, FileOperationsMixin, StepOperationsMixin,
         except Exception as e:
             import traceback
             error_msg = traceback.format_exc()
-            print(f"插入拆分合并单元格步骤失败: {error_msg}")
+            logger.error("插入拆分合并单元格步骤失败: %s", error_msg)
             QMessageBox.critical(self, "错误", f"插入拆分合并单元格步骤失败: {str(e)}")
  
 
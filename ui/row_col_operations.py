@@ -6,8 +6,16 @@
 提供Excel批量处理工具的行列操作相关功能
 """
 
+import logging
+
 from PyQt5.QtWidgets import QMessageBox
 
+from utils import PUNCTUATION_TABLE
+
+
+logger = logging.getLogger(__name__)
+
+
 class RowColOperationsMixin:
     """行列操作混入类，提供行列相关的操作方法"""
     
@@ -21,7 +29,7 @@ class RowColOperationsMixin:
             (bool, str): (是否有效, 错误信息)
         """
         # 替换中文符号为英文符号
-        text = text.replace('，', ',').replace('：', ':')
+        text = text.translate(PUNCTUATION_TABLE)
         
         # 分割多个范围
         ranges = text.split(',')
@@ -112,7 +120,7 @@ class RowColOperationsMixin:
                 return
             
             # 替换中文符号为英文符号
-            position = position.replace('，', ',').replace('：', ':')
+            position = position.translate(PUNCTUATION_TABLE)
             
             # 添加步骤
             params = {
@@ -135,7 +143,7 @@ class RowColOperationsMixin:
         except Exception as e:
             import traceback
             error_msg = traceback.format_exc()
-            print(f"添加行列操作步骤失败: {error_msg}")
+            logger.error("添加行列操作步骤失败: %s", error_msg)
             QMessageBox.critical(self, "错误", f"添加行列操作步骤失败: {str(e)}")
     
     def insert_row_col_step(self):
@@ -159,7 +167,7 @@ class RowColOperationsMixin:
                 return
             
             # 替换中文符号为英文符号
-            position = position.replace('，', ',').replace('：', ':')
+            position = position.translate(PUNCTUATION_TABLE)
             
             # 插入步骤
             params = {
@@ -182,7 +190,7 @@ class RowColOperationsMixin:
         except Exception as e:
             import traceback
             error_msg = traceback.format_exc()
-            print(f"插入行列操作步骤失败: {error_msg}")
+            logger.error("插入行列操作步骤失败: %s", error_msg)
             QMessageBox.critical(self, "错误", f"插入行列操作步骤失败: {str(e)}")
             QMessageBox.critical(self, "错误", f"添加步骤失败: {str(e)}")
             import traceback
@@ -214,7 +222,7 @@ class RowColOperationsMixin:
                 return
             
             # 替换中文符号为英文符号
-            position = position.replace('，', ',').replace('：', ':')
+            position = position.translate(PUNCTUATION_TABLE)
             
             # 安全地添加步骤
             self.safe_add_step_with_validation(operation, {'position': position}, self.position_edit)
@@ -7,8 +7,14 @@
 """
 
 import json
+import logging
 from PyQt5.QtWidgets import QMessageBox, QFileDialog
 from models import StepItem  
+from utils import PUNCTUATION_TABLE
+
+
+logger = logging.getLogger(__name__)
+
 
 class StepOperationsMixin:
     """步骤操作混入类，提供步骤相关的操作方法"""
@@ -65,7 +71,7 @@ class StepOperationsMixin:
         except Exception as e:
             import traceback
             error_msg = traceback.format_exc()
-            print(f"插入特定步骤失败: {error_msg}")
+            logger.error("插入特定步骤失败: %s", error_msg)
             QMessageBox.critical(self, "错误", f"插入特定步骤失败: {str(e)}")
     
     def get_selected_operation_type(self):
@@ -191,7 +197,7 @@ class StepOperationsMixin:
                     QMessageBox.warning(self, "警告", "请输入位置！")
                     return None
                 # 处理中文符号
-                position = position.replace('，', ',').replace('：', ':')
+                position = position.translate(PUNCTUATION_TABLE)
                 params['position'] = position
                 
                 # 如果是删除操作，获取合并单元格处理模式
@@ -231,12 +237,12 @@ class StepOperationsMixin:
                 # 提取真正的操作类型和参数
                 real_operation = params['operation']
                 real_params = params['params']
-                print(f"[DEBUG] 检测到嵌套参数结构，原始操作: {operation}, 实际操作: {real_operation}")
+                logger.debug("检测到嵌套参数结构，原始操作: %s, 实际操作: %s", operation, real_operation)
                 operation = real_operation
                 params = real_params
             
-            print(f"[DEBUG] 开始编辑步骤: {operation}, 参数: {params}")
-            print(f"[DEBUG] 当前步骤索引: {current_row}, 总步骤数: {len(self.steps)}")  
+            logger.debug("开始编辑步骤: %s, 参数: %s", operation, params)
+            logger.debug("当前步骤索引: %s, 总步骤数: %d", current_row, len(self.steps))  
             
             # 根据操作类型切换到相应的选项卡并填充数据
             if operation == 'convert_formulas_to_values' or operation == '公式转值':
@@ -263,7 +269,7 @@ class StepOperationsMixin:
                     if '保留值' in operation:
                         action = 'keep_value'
                 
-                print(f"[DEBUG] 设置拆分模式: {action}")
+                logger.debug("设置拆分模式: %s", action)
                 
                 if hasattr(self, 'unmerge_keep_value_radio') and action == 'keep_value':
                     self.unmerge_keep_value_radio.setChecked(True)
@@ -305,7 +311,7 @@ class StepOperationsMixin:
                     self.unmerge_range_edit.setText(range_str)
                     self.unmerge_range_edit.setFocus()
                     
-                print(f"[DEBUG] 设置拆分范围: {range_str}")
+                logger.debug("设置拆分范围: %s", range_str)
                     
             elif operation == 'merge_cells' or operation.startswith('合并单元格'):
                 # 合并单元格，切换到第二个选项卡
@@ -368,16 +374,14 @@ class StepOperationsMixin:
             # 更新步骤列表
             self.update_steps_list()
             
-            print(f"[DEBUG] 步骤编辑完成，剩余步骤数: {len(self.steps)}")
-            print(f"[DEBUG] 原始步骤信息: {original_step_info}")
-            print("")
+            logger.debug("步骤编辑完成，剩余步骤数: %d", len(self.steps))
+            logger.debug("原始步骤信息: %s", original_step_info)
             
         except Exception as e:
             import traceback
             error_msg = traceback.format_exc()
-            print(f"[ERROR] 编辑步骤失败: {error_msg}")
+            logger.error("编辑步骤失败: %s", error_msg)
             QMessageBox.critical(self, "错误", f"编辑步骤失败: {str(e)}")
-            print("")
     
     def delete_step(self):
         """删除选中的步骤"""
@@ -469,7 +473,7 @@ class StepOperationsMixin:
             except Exception as e:
                 import traceback
                 error_msg = traceback.format_exc()
-                print(f"导入步骤失败: {error_msg}")
+                logger.error("导入步骤失败: %s", error_msg)
                 QMessageBox.critical(self, "错误", f"导入步骤失败: {str(e)}")
 
     def init_merge_cells_ui(self):
@@ -9,6 +9,10 @@
 from openpyxl.utils import get_column_letter, column_index_from_string
 
 
+# 中文标点到英文标点的转换表，配合str.translate一次完成替换
+PUNCTUATION_TABLE = str.maketrans({'，': ',', '：': ':'})
+
+
 def parse_range_string(range_str):
     """
     解析范围字符串
@@ -20,7 +24,7 @@ def parse_range_string(range_str):
     - 支持中文符号：1，3：5 或 A，C：E
     """
     # 将中文符号转换为英文符号
-    range_str = range_str.replace('，', ',').replace('：', ':')
+    range_str = range_str.translate(PUNCTUATION_TABLE)
     
     # 分割多个范围
     parts = [p.strip() for p in range_str.split(',')]
@@ -68,6 +72,26 @@ def parse_range_string(range_str):
     return result
 
 
+def merge_spans(spans):
+    """
+    合并重叠或相邻的区间
+    
+    Args:
+        spans: (起始, 结束) 元组列表，均为闭区间
+    
+    Returns:
+        list: 按起始位置排序、互不重叠的 (起始, 结束) 元组列表
+    """
+    merged = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
 def convert_to_column_index(column_str):
     """
     将列标识转换为列索引
@@ -137,7 +161,7 @@ def validate_position_input(position_str, is_row=True):
         return False, "输入不能为空"
     
     # 将中文符号转换为英文符号
-    position_str = position_str.replace('，', ',').replace('：', ':')
+    position_str = position_str.translate(PUNCTUATION_TABLE)
     
     try:
         if is_row: